@@ -8,13 +8,21 @@ by Denis (BeforeMyCompileFails) 2025
 import os
 import sys
 import io
+import mmap
+import shutil
 import subprocess
-from PIL import Image, ExifTags
+import threading
+import queue
+import multiprocessing.util
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from PIL import Image, ExifTags, UnidentifiedImageError
 import piexif
 import argparse
-from datetime import datetime
+import time
 import json
 import re
+import struct
+import contextlib
 
 # Try to import additional libraries for more comprehensive extraction
 try:
@@ -22,282 +30,591 @@ try:
 except ImportError:
     exifread = None
 
+# Hyperscan provides a SIMD-accelerated prefilter for the raw binary scan
+try:
+    import hyperscan
+except ImportError:
+    hyperscan = None
+
+# Numba JIT-compiles a byte-scan prefilter when Hyperscan isn't available
+try:
+    import numba
+    import numpy as np
+except ImportError:
+    numba = None
+
 # Disable PyExifTool as it's causing hangs
 exiftool = None
 
+# Per-worker stay_open ExifTool process and extract_all_exif options, set by _init_worker
+_worker_exiftool = None
+_worker_options = {}
+
+# Supported image extensions (lower case, matched against the file suffix)
+IMAGE_EXTENSIONS = frozenset({'.jpg', '.jpeg', '.tiff', '.tif', '.png', '.bmp', '.heic', '.heif', '.nef', '.cr2', '.arw'})
+
+# Where the discovered ExifTool path is cached between runs
+EXIFTOOL_CACHE_FILE = os.path.join(os.path.expanduser("~"), ".cache", "exif_extractor", "exiftool_path")
+
+# Format used for every timestamp written to the reports
+TIMESTAMP_FORMAT = '%Y-%m-%d %H:%M:%S'
+
+# Patterns used to find profile date/time values, compiled once per process
+_ICC_DATE_RE = re.compile(r'\d{4}[-/]\d{2}[-/]\d{2}')
+_ICC_TIME_RE = re.compile(r'\d{2}:\d{2}:\d{2}')
+_PROFILE_DT_RE = re.compile(r'profile_date_time[:\s]+([^\n]+)', re.IGNORECASE)
+_RAW_PROFILE_DT_RE = re.compile(rb'profile[_\s]date[_\s]time[\s:\=]+([^\x00-\x1F]{8,25})', re.IGNORECASE)
+
+# Metadata lives near the start of a file (EXIF/ICC) or near its end (XMP),
+# so the raw scan only looks at these windows instead of the pixel data
+RAW_SCAN_HEAD_BYTES = 262144
+RAW_SCAN_TAIL_BYTES = 65536
+
+# Compiled Hyperscan database for the raw profile_date_time prefix, if available
+_RAW_PROFILE_HS_DB = None
+if hyperscan:
+    try:
+        _RAW_PROFILE_HS_DB = hyperscan.Database()
+        _RAW_PROFILE_HS_DB.compile(
+            expressions=[rb'profile[_\s]date[_\s]time'],
+            flags=[hyperscan.HS_FLAG_CASELESS | hyperscan.HS_FLAG_SOM_LEFTMOST],
+        )
+    except Exception:
+        _RAW_PROFILE_HS_DB = None
+
+if numba:
+    @numba.njit(cache=True, boundscheck=False)
+    def find_profile_prefix(buf, start):
+        """
+        Return the first index >= start where the uint8 array buf holds
+        'profile' in any letter case, or -1 if there is none.
+        """
+        # OR-ing 0x20 folds ASCII letters to lower case
+        for i in range(start, buf.shape[0] - 6):
+            if ((buf[i] | 0x20) == 0x70 and (buf[i + 1] | 0x20) == 0x72
+                    and (buf[i + 2] | 0x20) == 0x6f and (buf[i + 3] | 0x20) == 0x66
+                    and (buf[i + 4] | 0x20) == 0x69 and (buf[i + 5] | 0x20) == 0x6c
+                    and (buf[i + 6] | 0x20) == 0x65):
+                return i
+        return -1
+else:
+    find_profile_prefix = None
+
+# piexif tag name tables for each IFD, looked up once per tag
+_IFD_TAG_TABLES = {name: piexif.TAGS[name] for name in ("0th", "Exif", "GPS", "1st", "Interop")}
+
+# Bytes of a JPEG handed to piexif; enough to cover the APP1 (EXIF) segment
+PIEXIF_HEADER_BYTES = 65536
+
+# Seconds to wait for ExifTool to answer for one image before giving up on it
+EXIFTOOL_TIMEOUT = 30
+
+
+def _pump_lines(stream, lines):
+    """Copy lines from a pipe into a queue, ending with b"" at EOF."""
+    for line in iter(stream.readline, b""):
+        lines.put(line)
+    lines.put(b"")
+
+
+def start_exiftool(exiftool_path):
+    """Launch a persistent ExifTool process that reads its arguments from stdin."""
+    proc = subprocess.Popen(
+        [exiftool_path, "-stay_open", "True", "-@", "-"],
+        stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL
+    )
+    # stdout is read on a thread so replies can be waited for with a timeout
+    # (select() doesn't work on pipes on Windows)
+    proc.stdout_lines = queue.Queue()
+    threading.Thread(target=_pump_lines, args=(proc.stdout, proc.stdout_lines), daemon=True).start()
+    return proc
+
+
+def run_exiftool_stayopen(proc, image_path, timeout=EXIFTOOL_TIMEOUT):
+    """
+    Run one ExifTool JSON extraction on a stay_open process and return its
+    output, decoded as UTF-8 with invalid bytes replaced. Reads stdout until
+    the {ready} sentinel printed after each -execute. If ExifTool doesn't
+    answer within timeout seconds or has died, the process is killed and
+    subprocess.TimeoutExpired or RuntimeError is raised; the caller should
+    then start a new one. Paths containing a line break raise ValueError.
+    """
+    # Each line on stdin is one argument, so a line break in the path would
+    # inject arguments (even another -execute) into the command stream
+    if "\n" in image_path or "\r" in image_path:
+        raise ValueError("file name contains a line break, which ExifTool can't be given via stdin")
+    # Argfile lines aren't recoded on Windows, so say the file name is UTF-8
+    command = f"-charset\nfilename=utf8\n-j\n-a\n-u\n-G1\n{image_path}\n-execute\n"
+    try:
+        proc.stdin.write(command.encode('utf-8'))
+        proc.stdin.flush()
+    except OSError:
+        proc.kill()
+        proc.wait()
+        raise RuntimeError("ExifTool process exited unexpectedly")
+    
+    output = []
+    deadline = time.monotonic() + timeout
+    while True:
+        try:
+            line = proc.stdout_lines.get(timeout=max(deadline - time.monotonic(), 0))
+        except queue.Empty:
+            proc.kill()
+            proc.wait()
+            raise subprocess.TimeoutExpired(proc.args, timeout)
+        if not line:
+            proc.kill()
+            proc.wait()
+            raise RuntimeError("ExifTool process exited unexpectedly")
+        if line.strip() == b"{ready}":
+            break
+        output.append(line)
+    return b"".join(output).decode('utf-8', errors='replace')
+
+
+def stop_exiftool(proc):
+    """Ask a stay_open ExifTool process to exit, killing it if it doesn't."""
+    try:
+        proc.stdin.write(b"-stay_open\nFalse\n")
+        proc.stdin.flush()
+        proc.wait(timeout=5)
+    except Exception:
+        proc.kill()
+
+
+def _raw_profile_candidates(buf, start, end):
+    """Yield offsets in buf[start:end] where a profile_date_time entry may begin."""
+    if _RAW_PROFILE_HS_DB is not None:
+        offsets = []
+        
+        def on_match(pattern_id, match_start, match_end, flags, context):
+            offsets.append(start + match_start)
+        
+        _RAW_PROFILE_HS_DB.scan(buf[start:end], match_event_handler=on_match)
+        yield from offsets
+        return
+    
+    if find_profile_prefix is not None:
+        window = np.frombuffer(buf[start:end], dtype=np.uint8)
+        pos = find_profile_prefix(window, 0)
+        while pos != -1:
+            yield start + pos
+            pos = find_profile_prefix(window, pos + 1)
+        return
+    
+    # Fold the window to lower case once so every spelling is found, leftmost first
+    window = buf[start:end].lower()
+    pos = window.find(b'profile')
+    while pos != -1:
+        yield start + pos
+        pos = window.find(b'profile', pos + 1)
+
+
+def _search_raw_window(buf, start, end):
+    """Search one window of a binary buffer for a profile_date_time entry."""
+    for pos in _raw_profile_candidates(buf, start, end):
+        # Only run the regex on a short slice right after a candidate hit
+        match = _RAW_PROFILE_DT_RE.match(buf, pos, min(pos + 512, len(buf)))
+        if match:
+            return match
+    return None
+
+
+def find_raw_profile_dt(buf):
+    """
+    Look for a profile_date_time entry in the header and trailer windows
+    of a binary buffer (bytes or mmap). Returns a regex match or None.
+    """
+    size = len(buf)
+    head_end = min(size, RAW_SCAN_HEAD_BYTES)
+    match = _search_raw_window(buf, 0, head_end)
+    if match is None and size > head_end:
+        match = _search_raw_window(buf, max(head_end, size - RAW_SCAN_TAIL_BYTES), size)
+    return match
+
 
-def extract_all_exif(image_path, exiftool_path=None):
+def extract_all_exif(image_path, exiftool_proc=None, stop_on_profile_dt=False, file_stat=None,
+                     exifread_details=False):
     """
     Extract all available EXIF data from an image file using multiple methods
-    to ensure maximum information extraction.
+    to ensure maximum information extraction. Returns a dict mapping each
+    category (e.g. "PIL", "Exif", "EXIFTOOL_CMD") to a dict of its tags.
+    With stop_on_profile_dt, the remaining methods are skipped as soon as a
+    profile date/time has been found. Pass file_stat to reuse a stat result
+    the caller already has. Unless exifread_details is set, ExifRead skips
+    MakerNote, UserComment and XMP tags and the SubIFDs (where NEF/ARW keep
+    their main-image IFDs); piexif and PIL still report UserComment and XMP.
     """
     exif_data = {}
     filename = os.path.basename(image_path)
     
     # Add file metadata
-    file_stat = os.stat(image_path)
-    exif_data["FILE_SIZE"] = file_stat.st_size
-    exif_data["FILE_CREATED"] = datetime.fromtimestamp(file_stat.st_ctime).strftime('%Y-%m-%d %H:%M:%S')
-    exif_data["FILE_MODIFIED"] = datetime.fromtimestamp(file_stat.st_mtime).strftime('%Y-%m-%d %H:%M:%S')
-    exif_data["FILE_NAME"] = filename
+    if file_stat is None:
+        file_stat = os.stat(image_path)
+    exif_data["FILE"] = {
+        "SIZE": file_stat.st_size,
+        "CREATED": time.strftime(TIMESTAMP_FORMAT, time.localtime(file_stat.st_ctime)),
+        "MODIFIED": time.strftime(TIMESTAMP_FORMAT, time.localtime(file_stat.st_mtime)),
+        "NAME": filename,
+    }
     
-    # Method 1: Using PIL's built-in EXIF extraction
+    # An empty file can't be mapped and has nothing to extract
+    if not file_stat.st_size:
+        return exif_data
+    
+    # Open the file once: PIL and ExifRead read the file object, which tolerates
+    # seeks past the end of damaged files, while the raw scan and piexif header
+    # slice use a read-only map of it so only the pages they touch get loaded
+    f = None
+    mm = None
     try:
-        with Image.open(image_path) as img:
-            # Get standard EXIF data if available
-            if hasattr(img, '_getexif') and img._getexif():
-                exif_info = img._getexif()
-                if exif_info:
-                    for tag, value in exif_info.items():
-                        tag_name = ExifTags.TAGS.get(tag, tag)
-                        exif_data[f"PIL_{tag_name}"] = value
-            
-            # Get all image info including ICC profile data
-            exif_data["PIL_FORMAT"] = img.format
-            exif_data["PIL_MODE"] = img.mode
-            exif_data["PIL_SIZE"] = img.size
-            exif_data["PIL_WIDTH"] = img.width
-            exif_data["PIL_HEIGHT"] = img.height
-            
-            # Extract ICC profile information if present
-            if "icc_profile" in img.info:
-                exif_data["ICC_PROFILE_PRESENT"] = True
-                exif_data["ICC_PROFILE_SIZE"] = len(img.info["icc_profile"])
+        try:
+            f = open(image_path, 'rb')
+            mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except (OSError, ValueError) as e:
+            # Each method falls back to reading image_path and reports its own error
+            exif_data["FILE"]["OPEN_ERROR"] = str(e)
+        
+        # Method 1: Using PIL's built-in EXIF extraction
+        try:
+            if f is not None:
+                f.seek(0)
+            with Image.open(f if f is not None else image_path) as img:
+                pil_tags = exif_data.setdefault("PIL", {})
                 
-                # Try to extract profile date/time from ICC
-                try:
-                    icc_data = img.info["icc_profile"]
-                    # Look for date and time strings in the ICC profile
-                    text = icc_data.decode('ascii', errors='ignore')
-                    
-                    # Extract profile creation datetime (common formats)
-                    date_matches = re.findall(r'\d{4}[-/]\d{2}[-/]\d{2}', text)
-                    time_matches = re.findall(r'\d{2}:\d{2}:\d{2}', text)
-                    
-                    if date_matches:
-                        exif_data["ICC_PROFILE_DATE"] = date_matches[0]
-                    if time_matches:
-                        exif_data["ICC_PROFILE_TIME"] = time_matches[0]
+                # Get standard EXIF data if available
+                if hasattr(img, '_getexif') and img._getexif():
+                    exif_info = img._getexif()
+                    if exif_info:
+                        for tag, value in exif_info.items():
+                            tag_name = ExifTags.TAGS.get(tag, tag)
+                            pil_tags[tag_name] = value
+                
+                # Get all image info including ICC profile data
+                pil_tags["FORMAT"] = img.format
+                pil_tags["MODE"] = img.mode
+                pil_tags["SIZE"] = img.size
+                pil_tags["WIDTH"] = img.width
+                pil_tags["HEIGHT"] = img.height
+                
+                # Extract ICC profile information if present
+                if "icc_profile" in img.info:
+                    icc_tags = exif_data.setdefault("ICC", {})
+                    icc_tags["PROFILE_PRESENT"] = True
+                    icc_tags["PROFILE_SIZE"] = len(img.info["icc_profile"])
                     
-                    # Look specifically for profile_date_time patterns
-                    profile_dt_match = re.search(r'profile_date_time[:\s]+([^\n]+)', text, re.IGNORECASE)
-                    if profile_dt_match:
-                        exif_data["PROFILE_DATE_TIME"] = profile_dt_match.group(1).strip()
-                except Exception as e:
-                    exif_data["ICC_PROFILE_PARSE_ERROR"] = str(e)
-            
-            # Get ALL image info items, including metadata profiles
-            for k, v in img.info.items():
-                if isinstance(v, (str, int, float, tuple, list, bool)):
-                    exif_data[f"INFO_{k}"] = v
-                elif isinstance(v, bytes) and len(v) < 1000:  # Only process reasonably sized byte data
+                    # Try to extract profile date/time from ICC
                     try:
-                        # Try to decode as string
-                        decoded = v.decode('utf-8', errors='ignore')
-                        # Look for date/time information
-                        if "date" in k.lower() or "time" in k.lower():
-                            exif_data[f"INFO_{k}"] = decoded
-                    except:
-                        exif_data[f"INFO_{k}_SIZE"] = len(v)
-    except Exception as e:
-        exif_data["PIL_ERROR"] = str(e)
-    
-    # Method 2: Using piexif for more detailed EXIF extraction
-    try:
-        exif_dict = piexif.load(image_path)
+                        icc_data = img.info["icc_profile"]
+                        # Look for date and time strings in the ICC profile
+                        text = icc_data.decode('ascii', errors='ignore')
+                        
+                        # Extract profile creation datetime (common formats)
+                        date_matches = _ICC_DATE_RE.findall(text)
+                        time_matches = _ICC_TIME_RE.findall(text)
+                        
+                        if date_matches:
+                            icc_tags["PROFILE_DATE"] = date_matches[0]
+                        if time_matches:
+                            icc_tags["PROFILE_TIME"] = time_matches[0]
+                        
+                        # Look specifically for profile_date_time patterns
+                        profile_dt_match = _PROFILE_DT_RE.search(text)
+                        if profile_dt_match:
+                            exif_data.setdefault("PROFILE", {})["PROFILE_DATE_TIME"] = profile_dt_match.group(1).strip()
+                    except Exception as e:
+                        icc_tags["PROFILE_PARSE_ERROR"] = str(e)
+                
+                # Get ALL image info items, including metadata profiles
+                for k, v in img.info.items():
+                    if isinstance(v, (str, int, float, tuple, list, bool)):
+                        exif_data.setdefault("INFO", {})[k] = v
+                    elif isinstance(v, bytes) and len(v) < 1000:  # Only process reasonably sized byte data
+                        # Only date/time entries are kept, so check the key before decoding
+                        key_lower = k.lower()
+                        if "date" in key_lower or "time" in key_lower:
+                            try:
+                                exif_data.setdefault("INFO", {})[k] = v.decode('utf-8', errors='ignore')
+                            except:
+                                exif_data.setdefault("INFO", {})[f"{k}_SIZE"] = len(v)
+        except UnidentifiedImageError:
+            # PIL names the file object in its message, so name the file instead
+            exif_data.setdefault("PIL", {})["ERROR"] = f"cannot identify image file {image_path!r}"
+        except Exception as e:
+            exif_data.setdefault("PIL", {})["ERROR"] = str(e)
         
-        # Process each EXIF directory
-        for ifd_name in ("0th", "Exif", "GPS", "1st", "Interop"):
-            if ifd_name in exif_dict and exif_dict[ifd_name]:
-                for tag, value in exif_dict[ifd_name].items():
-                    # Get tag name if possible
-                    if ifd_name == "0th":
-                        tag_name = piexif.TAGS["0th"].get(tag, {}).get("name", tag)
-                    elif ifd_name == "Exif":
-                        tag_name = piexif.TAGS["Exif"].get(tag, {}).get("name", tag)
-                    elif ifd_name == "GPS":
-                        tag_name = piexif.TAGS["GPS"].get(tag, {}).get("name", tag)
-                    elif ifd_name == "1st":
-                        tag_name = piexif.TAGS["1st"].get(tag, {}).get("name", tag)
-                    elif ifd_name == "Interop":
-                        tag_name = piexif.TAGS["Interop"].get(tag, {}).get("name", tag)
-                    else:
-                        tag_name = str(tag)
-                    
-                    # Handle different types of values
-                    if isinstance(value, bytes):
-                        try:
-                            # Try to decode as string
-                            decoded_value = value.decode('utf-8', errors='replace')
-                            exif_data[f"{ifd_name}_{tag_name}"] = decoded_value
-                            
-                            # Look for profile date time in decoded strings
-                            if "profile" in decoded_value.lower() and ("date" in decoded_value.lower() or "time" in decoded_value.lower()):
-                                exif_data["DECODED_PROFILE_DATE_TIME"] = decoded_value
-                        except:
-                            # If can't decode, store as hex representation
-                            exif_data[f"{ifd_name}_{tag_name}"] = value.hex()
-                    else:
-                        exif_data[f"{ifd_name}_{tag_name}"] = value
+        if stop_on_profile_dt and find_profile_dt(exif_data):
+            return exif_data
         
-        # Handle thumbnail if present
-        if "thumbnail" in exif_dict and exif_dict["thumbnail"]:
-            exif_data["THUMBNAIL_PRESENT"] = True
-            exif_data["THUMBNAIL_SIZE"] = len(exif_dict["thumbnail"])
-    except Exception as e:
-        exif_data["PIEXIF_ERROR"] = str(e)
-    
-    # Method 3: Using exifread if available
-    if exifread:
-        try:
-            with open(image_path, 'rb') as f:
-                tags = exifread.process_file(f, details=True)
-                for tag, value in tags.items():
-                    exif_data[f"EXIFREAD_{tag}"] = str(value)
-        except Exception as e:
-            exif_data["EXIFREAD_ERROR"] = str(e)
-    
-    # Method 4: Using exiftool if available (most comprehensive)
-    if exiftool:
-        try:
-            with exiftool.ExifTool() as et:
-                # Check if exiftool is properly installed
-                if et.run():
-                    metadata = et.get_metadata(image_path)
-                    for tag, value in metadata.items():
-                        # Clean up tag name
-                        clean_tag = tag.replace(":", "_").replace(" ", "_")
-                        exif_data[f"EXIFTOOL_{clean_tag}"] = value
-        except Exception as e:
-            # Only add error if it's not the common "not found" error
-            if not "not found" in str(e) and not "cannot find" in str(e).lower():
-                exif_data["EXIFTOOL_ERROR"] = str(e)
-    
-    # Method 5: Using external exiftool command if installed
-    if exiftool_path:
+        # Method 2: Using piexif for more detailed EXIF extraction
         try:
-            # Use the provided exiftool path with a timeout to avoid hangs
-            result = subprocess.run(
-                [exiftool_path, "-j", "-a", "-u", "-G1", image_path],
-                capture_output=True, text=True, timeout=30, check=False
-            )
-            if result.returncode == 0:
+            exif_dict = None
+            if mm is not None and mm[:2] == b"\xff\xd8":
+                # JPEG EXIF lives in APP1 near the start, so try just the header
                 try:
-                    exiftool_json = json.loads(result.stdout)
+                    exif_dict = piexif.load(mm[:PIEXIF_HEADER_BYTES])
+                except (piexif.InvalidImageDataError, struct.error):
+                    exif_dict = None
+            if exif_dict is None:
+                exif_dict = piexif.load(image_path)
+            
+            # Process each EXIF directory
+            for ifd_name, tag_table in _IFD_TAG_TABLES.items():
+                if ifd_name in exif_dict and exif_dict[ifd_name]:
+                    ifd_tags = exif_data.setdefault(ifd_name, {})
+                    for tag, value in exif_dict[ifd_name].items():
+                        # Get tag name if possible
+                        tag_name = tag_table.get(tag, {}).get("name", tag)
+                        
+                        # Handle different types of values
+                        if isinstance(value, bytes):
+                            try:
+                                # Try to decode as string
+                                decoded_value = value.decode('utf-8', errors='replace')
+                                ifd_tags[tag_name] = decoded_value
+                                
+                                # Look for profile date time in decoded strings
+                                if "profile" in decoded_value.lower() and ("date" in decoded_value.lower() or "time" in decoded_value.lower()):
+                                    exif_data.setdefault("DECODED", {})["PROFILE_DATE_TIME"] = decoded_value
+                            except:
+                                # If can't decode, store as hex representation
+                                ifd_tags[tag_name] = value.hex()
+                        else:
+                            ifd_tags[tag_name] = value
+            
+            # Handle thumbnail if present
+            if "thumbnail" in exif_dict and exif_dict["thumbnail"]:
+                exif_data["THUMBNAIL"] = {
+                    "PRESENT": True,
+                    "SIZE": len(exif_dict["thumbnail"]),
+                }
+        except Exception as e:
+            exif_data.setdefault("PIEXIF", {})["ERROR"] = str(e)
+        
+        if stop_on_profile_dt and find_profile_dt(exif_data):
+            return exif_data
+        
+        # Method 3: Using exifread if available
+        if exifread:
+            try:
+                # details=False skips MakerNote (which dominates ExifRead's runtime),
+                # UserComment, XMP and SubIFDs, so the full pass is opt-in
+                with open(image_path, 'rb') if f is None else contextlib.nullcontext(f) as fh:
+                    fh.seek(0)
+                    tags = exifread.process_file(fh, details=exifread_details, stop_tag='UNDEF', strict=False)
+                if tags:
+                    # Keep the tag objects; they are only stringified when written out.
+                    # Other entries (the raw JPEGThumbnail bytes) are stored as their repr
+                    exif_data["EXIFREAD"] = {
+                        tag: value if hasattr(value, 'printable') else str(value)
+                        for tag, value in tags.items()
+                    }
+            except Exception as e:
+                exif_data.setdefault("EXIFREAD", {})["ERROR"] = str(e)
+        
+        if stop_on_profile_dt and find_profile_dt(exif_data):
+            return exif_data
+        
+        # Method 4: Using exiftool if available (most comprehensive)
+        if exiftool:
+            try:
+                with exiftool.ExifTool() as et:
+                    # Check if exiftool is properly installed
+                    if et.run():
+                        metadata = et.get_metadata(image_path)
+                        for tag, value in metadata.items():
+                            # Clean up tag name
+                            clean_tag = tag.replace(":", "_").replace(" ", "_")
+                            exif_data.setdefault("EXIFTOOL", {})[clean_tag] = value
+            except Exception as e:
+                # Only add error if it's not the common "not found" error
+                if not "not found" in str(e) and not "cannot find" in str(e).lower():
+                    exif_data.setdefault("EXIFTOOL", {})["ERROR"] = str(e)
+        
+        if stop_on_profile_dt and find_profile_dt(exif_data):
+            return exif_data
+        
+        # Method 5: Using the persistent exiftool process if available
+        if exiftool_proc:
+            try:
+                output = run_exiftool_stayopen(exiftool_proc, image_path)
+                if output.strip():
+                    # Output is already decoded leniently; strict=False also accepts
+                    # raw control characters in values, so one parse is enough
+                    exiftool_json = json.loads(output, strict=False)
                     if exiftool_json and len(exiftool_json) > 0:
+                        cmd_tags = exif_data.setdefault("EXIFTOOL_CMD", {})
                         for key, value in exiftool_json[0].items():
                             # Clean up tag name
                             clean_key = key.replace(":", "_").replace(" ", "_")
-                            exif_data[f"EXIFTOOL_CMD_{clean_key}"] = value
+                            cmd_tags[clean_key] = value
                             
                             # Look specifically for profile date time
                             if "profile" in key.lower() and ("date" in key.lower() or "time" in key.lower()):
-                                exif_data["PROFILE_DATE_TIME"] = value
-                except json.JSONDecodeError:
-                    # If JSON parsing fails, try regular format
-                    try:
-                        # Run again with regular format
-                        plain_result = subprocess.run(
-                            [exiftool_path, "-a", "-u", "-G1", image_path],
-                            capture_output=True, text=True, timeout=15, check=False
-                        )
-                        
-                        if plain_result.returncode == 0:
-                            # Process raw output
-                            for line in plain_result.stdout.splitlines():
-                                if ":" in line:
-                                    parts = line.split(":", 1)
-                                    if len(parts) == 2:
-                                        key = parts[0].strip().replace(" ", "_")
-                                        value = parts[1].strip()
-                                        exif_data[f"EXIFTOOL_RAW_{key}"] = value
-                                        
-                                        # Look specifically for profile date time
-                                        if "profile" in key.lower() and ("date" in key.lower() or "time" in key.lower()):
-                                            exif_data["PROFILE_DATE_TIME"] = value
-                    except Exception as e:
-                        exif_data["EXIFTOOL_PLAIN_ERROR"] = str(e)
-        except subprocess.TimeoutExpired:
-            exif_data["EXIFTOOL_TIMEOUT"] = "ExifTool command timed out after 30 seconds"
-        except Exception as e:
-            # Don't add error message if exiftool simply isn't installed
-            if not "not found" in str(e) and not "cannot find" in str(e).lower():
-                exif_data["EXIFTOOL_CMD_ERROR"] = str(e)
-    
-    # Additional checks for raw binary data that might contain profile date/time
-    try:
-        with open(image_path, 'rb') as f:
-            raw_data = f.read()
-            # Look for common date format patterns in binary data
-            date_pattern = re.compile(b'profile[_\\s]date[_\\s]time[\\s:\\=]+([^\\x00-\\x1F]{8,25})', re.IGNORECASE)
-            match = date_pattern.search(raw_data)
+                                exif_data.setdefault("PROFILE", {})["PROFILE_DATE_TIME"] = value
+            except subprocess.TimeoutExpired:
+                exif_data.setdefault("EXIFTOOL_CMD", {})["TIMEOUT"] = f"ExifTool command timed out after {EXIFTOOL_TIMEOUT} seconds"
+            except Exception as e:
+                # Don't add error message if exiftool simply isn't installed
+                if not "not found" in str(e) and not "cannot find" in str(e).lower():
+                    exif_data.setdefault("EXIFTOOL_CMD", {})["ERROR"] = str(e)
+        
+        if stop_on_profile_dt and find_profile_dt(exif_data):
+            return exif_data
+        
+        # Additional checks for raw binary data that might contain profile date/time
+        try:
+            if mm is not None:
+                match = find_raw_profile_dt(mm)
+            else:
+                with open(image_path, 'rb') as raw_file:
+                    match = find_raw_profile_dt(raw_file.read())
             if match:
                 try:
                     decoded = match.group(1).decode('utf-8', errors='replace')
-                    exif_data["RAW_PROFILE_DATE_TIME"] = decoded
+                    exif_data.setdefault("RAW", {})["PROFILE_DATE_TIME"] = decoded
                 except:
                     pass
-    except Exception as e:
-        exif_data["RAW_SEARCH_ERROR"] = str(e)
-    
-    return exif_data
+        except Exception as e:
+            exif_data.setdefault("RAW", {})["SEARCH_ERROR"] = str(e)
+        
+        return exif_data
+    finally:
+        if mm is not None:
+            mm.close()
+        if f is not None:
+            f.close()
 
 
-def format_exif_data(exif_data):
-    """Format EXIF data for text file output with proper indentation and formatting."""
-    result = []
-    result.append("=" * 80)
-    result.append(f"EXIF Data Extraction - {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
-    result.append("=" * 80)
-    result.append("")
-    
-    # Process and sort the exif data by categories
-    categories = {}
-    
-    for key, value in sorted(exif_data.items()):
-        # Determine category from key prefix
-        if "_" in key:
-            cat = key.split("_")[0]
-        else:
-            cat = "Other"
-        
-        if cat not in categories:
-            categories[cat] = []
-        
-        # Format the value for better readability
-        if isinstance(value, bytes):
-            try:
-                formatted_value = value.decode('utf-8', errors='replace')
-            except:
-                formatted_value = f"<binary data: {len(value)} bytes>"
-        elif isinstance(value, (tuple, list)) and len(value) > 5:
-            formatted_value = f"{str(value[:5])[:-1]}, ... (total items: {len(value)}))"
-        else:
-            formatted_value = str(value)
-        
-        categories[cat].append((key, formatted_value))
+def find_profile_dt(exif_data):
+    """
+    Return the first (category, key, value) whose key looks like a profile
+    date/time entry, or None if there is none.
+    """
+    for cat, tags in exif_data.items():
+        for key, value in tags.items():
+            key_lower = str(key).lower()
+            if "profile" in key_lower and ("date" in key_lower or "time" in key_lower):
+                return cat, key, value
+    return None
+
+
+def write_exif_data(exif_data, fh):
+    """Write EXIF data to an open text file with proper indentation and formatting."""
+    fh.write("=" * 80 + "\n")
+    fh.write(f"EXIF Data Extraction - {time.strftime(TIMESTAMP_FORMAT)}\n")
+    fh.write("=" * 80 + "\n")
+    fh.write("\n")
     
-    # Print data by category
-    for cat in sorted(categories.keys()):
-        result.append(f"[{cat}]")
-        result.append("-" * 80)
+    # Write data by category, formatting each value as it is written
+    for cat in sorted(exif_data):
+        fh.write(f"[{cat}]\n")
+        fh.write("-" * 80 + "\n")
         
-        for key, value in categories[cat]:
+        # Tag names may be ints when no name is known, so sort them as strings
+        for key, value in sorted(exif_data[cat].items(), key=lambda item: str(item[0])):
+            # Format the value for better readability
+            if isinstance(value, bytes):
+                try:
+                    formatted_value = value.decode('utf-8', errors='replace')
+                except:
+                    formatted_value = f"<binary data: {len(value)} bytes>"
+            elif hasattr(value, 'printable'):
+                # ExifRead IfdTag; its printable form is what str() would return
+                formatted_value = value.printable
+            elif isinstance(value, (tuple, list)) and len(value) > 5:
+                formatted_value = f"{str(value[:5])[:-1]}, ... (total items: {len(value)}))"
+            else:
+                formatted_value = str(value)
+            
             # Handle multiline values
-            if "\n" in str(value):
-                result.append(f"{key}:")
-                for line in str(value).split("\n"):
-                    result.append(f"    {line}")
+            if "\n" in formatted_value:
+                fh.write(f"{key}:\n")
+                for line in formatted_value.split("\n"):
+                    fh.write(f"    {line}\n")
             else:
-                result.append(f"{key}: {value}")
+                fh.write(f"{key}: {formatted_value}\n")
         
-        result.append("")
-    
-    return "\n".join(result)
+        fh.write("\n")
 
 
-def process_folder(folder_path):
-    """Process all images in a folder and extract their EXIF data."""
+def _read_cached_exiftool_path():
+    """
+    Return the ExifTool path cached by a previous run if it is still an
+    executable file. A missing or non-executable cached path is forgotten so
+    ExifTool gets probed again; one that fails to start is forgotten by
+    _start_worker_exiftool, so the next run probes again.
+    """
+    try:
+        with open(EXIFTOOL_CACHE_FILE, 'r', encoding='utf-8') as f:
+            path = f.read().strip()
+    except OSError:
+        return None
+    if not path or not os.path.isfile(path) or not os.access(path, os.X_OK):
+        _clear_cached_exiftool_path()
+        return None
+    return path
+
+
+def _save_cached_exiftool_path(exiftool_path):
+    """Cache the discovered ExifTool path; failures only cost a re-probe next run."""
+    try:
+        os.makedirs(os.path.dirname(EXIFTOOL_CACHE_FILE), exist_ok=True)
+        with open(EXIFTOOL_CACHE_FILE, 'w', encoding='utf-8') as f:
+            f.write(exiftool_path)
+    except OSError:
+        pass
+
+
+def _clear_cached_exiftool_path():
+    """Delete the cached ExifTool path so the next run probes for ExifTool again."""
+    try:
+        os.remove(EXIFTOOL_CACHE_FILE)
+    except OSError:
+        pass
+
+
+def _start_worker_exiftool(exiftool_path):
+    """
+    Start a stay_open ExifTool process that is shut down when the worker exits.
+    Returns None if it can't be started, so the worker uses the other methods.
+    """
+    try:
+        proc = start_exiftool(exiftool_path)
+    except OSError as e:
+        print(f"Error starting ExifTool at {exiftool_path}: {e}")
+        _clear_cached_exiftool_path()
+        return None
+    multiprocessing.util.Finalize(None, stop_exiftool, args=(proc,), exitpriority=10)
+    return proc
+
+
+def _init_worker(exiftool_path, options):
+    """Start the stay_open ExifTool process used by this worker."""
+    global _worker_exiftool, _worker_options
+    _worker_options = options
+    if exiftool_path:
+        _worker_exiftool = _start_worker_exiftool(exiftool_path)
+
+
+def _extract_in_worker(image_path, file_stat=None):
+    """Extract EXIF data inside a worker process."""
+    global _worker_exiftool
+    try:
+        return extract_all_exif(image_path, _worker_exiftool, file_stat=file_stat, **_worker_options)
+    finally:
+        # Replace an ExifTool process that died or was killed after a timeout
+        if _worker_exiftool is not None and _worker_exiftool.poll() is not None:
+            _worker_exiftool = _start_worker_exiftool(_worker_exiftool.args[0])
+
+
+def process_folder(folder_path, stop_on_profile_dt=False, exifread_details=False):
+    """
+    Process all images in a folder and extract their EXIF data.
+    With stop_on_profile_dt, extraction for an image stops once a profile
+    date/time has been found. With exifread_details, ExifRead also decodes
+    MakerNote, UserComment and XMP tags and the SubIFDs.
+    """
     print(f"Processing images in folder: {folder_path}")
     
     # Check if folder exists
@@ -305,22 +622,22 @@ def process_folder(folder_path):
         print(f"Error: The folder '{folder_path}' does not exist.")
         return
     
-    # Get all files in the folder
-    files = os.listdir(folder_path)
+    # Get all entries in the folder; DirEntry caches file type and stat info
+    with os.scandir(folder_path) as it:
+        entries = list(it)
     
     # Count variables
-    total_files = 0
     processed_files = 0
     
-    # Supported image extensions
-    image_extensions = ('.jpg', '.jpeg', '.tiff', '.tif', '.png', '.bmp', '.heic', '.heif', '.nef', '.cr2', '.arw')
-    
-    # Check for ExifTool availability and save path if found
-    exiftool_path = None
+    # Check for ExifTool availability, starting with the path cached by a previous run
+    exiftool_path = _read_cached_exiftool_path()
+    exiftool_cached = exiftool_path is not None
+    if exiftool_cached:
+        print(f"ExifTool found at: {exiftool_path} (cached)")
     
     # First check for a direct path in recently installed location
     direct_exiftool_path = os.path.join(os.environ.get('LOCALAPPDATA', ''), "ExifTool", "exiftool.exe")
-    if os.path.exists(direct_exiftool_path):
+    if not exiftool_path and os.path.exists(direct_exiftool_path):
         try:
             result = subprocess.run([direct_exiftool_path, "-ver"], 
                                   capture_output=True, text=True, timeout=5, check=False)
@@ -351,6 +668,10 @@ def process_folder(folder_path):
             except:
                 continue
     
+    # Remember a newly found ExifTool so later runs can skip the probing
+    if exiftool_path and not exiftool_cached:
+        _save_cached_exiftool_path(shutil.which(exiftool_path) or exiftool_path)
+    
     if not exiftool_path:
         print("Warning: ExifTool command line utility not found.")
         print("For most complete extraction (including profile_date_time), install ExifTool from: https://exiftool.org/")
@@ -366,52 +687,57 @@ def process_folder(folder_path):
         print("Note: ExifRead module not available. Consider installing for better extraction:")
         print("pip install ExifRead\n")
         
-    for filename in files:
-        total_files += 1
-        file_path = os.path.join(folder_path, filename)
-        
-        # Skip if not a file
-        if not os.path.isfile(file_path):
-            continue
-        
-        # Check if it's an image file
-        if not filename.lower().endswith(image_extensions):
-            continue
+    # Keep only real image files so workers get no wasted submissions
+    total_files = len(entries)
+    image_entries = [
+        entry for entry in entries
+        if entry.is_file() and os.path.splitext(entry.name)[1].lower() in IMAGE_EXTENSIONS
+    ]
+    
+    # Extract in parallel; each worker owns one stay_open ExifTool process
+    options = {"stop_on_profile_dt": stop_on_profile_dt, "exifread_details": exifread_details}
+    with ProcessPoolExecutor(initializer=_init_worker, initargs=(exiftool_path, options)) as executor:
+        futures = {}
+        for entry in image_entries:
+            # DirEntry.stat() is served from the directory listing on Windows. If the
+            # file has gone, the worker stats it again and reports the error for it
+            try:
+                file_stat = entry.stat()
+            except OSError:
+                file_stat = None
+            futures[executor.submit(_extract_in_worker, entry.path, file_stat)] = entry.name
         
-        try:
-            print(f"Processing: {filename}")
-            
-            # Extract EXIF data
-            exif_data = extract_all_exif(file_path, exiftool_path)
-            
-            # Specifically check for profile_date_time
-            has_profile_date = False
-            for key in exif_data:
-                if "profile" in key.lower() and ("date" in key.lower() or "time" in key.lower()):
-                    has_profile_date = True
-                    print(f"  Found profile date/time: {key} = {exif_data[key]}")
-                    break
-                    
-            if not has_profile_date:
-                print(f"  Note: No profile_date_time found in {filename}")
-            
-            # Format the EXIF data for output
-            formatted_data = format_exif_data(exif_data)
-            
-            # Create output filename (same as original but with .txt extension)
-            base_name = os.path.splitext(filename)[0]
-            output_file = os.path.join(folder_path, f"{base_name}.txt")
-            
-            # Write to output file
-            with open(output_file, 'w', encoding='utf-8') as f:
-                f.write(formatted_data)
-            
-            processed_files += 1
-            print(f"  EXIF data saved to: {output_file}")
-            print(f"  Total EXIF tags found: {len(exif_data)}")
-            
-        except Exception as e:
-            print(f"Error processing {filename}: {e}")
+        for future in as_completed(futures):
+            # Drop the finished future so its result is freed once the report is written
+            filename = futures.pop(future)
+            try:
+                print(f"Finished: {filename}")
+                
+                # Collect the extracted EXIF data
+                exif_data = future.result()
+                
+                # Specifically check for profile_date_time
+                profile_date = find_profile_dt(exif_data)
+                if profile_date:
+                    cat, key, value = profile_date
+                    print(f"  Found profile date/time: [{cat}] {key} = {value}")
+                else:
+                    print(f"  Note: No profile_date_time found in {filename}")
+                
+                # Create output filename (same as original but with .txt extension)
+                base_name = os.path.splitext(filename)[0]
+                output_file = os.path.join(folder_path, f"{base_name}.txt")
+                
+                # Write to output file, formatting as we go
+                with open(output_file, 'w', encoding='utf-8', buffering=1 << 20) as f:
+                    write_exif_data(exif_data, f)
+                
+                processed_files += 1
+                print(f"  EXIF data saved to: {output_file}")
+                print(f"  Total EXIF tags found: {sum(len(tags) for tags in exif_data.values())}")
+                
+            except Exception as e:
+                print(f"Error processing {filename}: {e}")
     
     print(f"\nSummary: Processed {processed_files} of {total_files} files in the folder.")
     if processed_files > 0:
@@ -612,6 +938,8 @@ def main():
     parser.add_argument('folder', help='Path to the folder containing images')
     parser.add_argument('--install-deps', action='store_true', help='Install recommended dependencies for maximum EXIF extraction')
     parser.add_argument('--install-exiftool', action='store_true', help='Download and install ExifTool (Windows only)')
+    parser.add_argument('--stop-on-profile-dt', action='store_true', help='Stop extracting an image once a profile date/time is found (faster, less complete output)')
+    parser.add_argument('--exifread-details', action='store_true', help='Let ExifRead also decode MakerNote, UserComment and XMP tags and SubIFDs (slower)')
     
     args = parser.parse_args()
     
@@ -640,7 +968,8 @@ def main():
             print("You may need to install them manually:")
             print("pip install Pillow piexif ExifRead PyExifTool")
     
-    process_folder(args.folder)
+    process_folder(args.folder, stop_on_profile_dt=args.stop_on_profile_dt,
+                   exifread_details=args.exifread_details)
 
 
 if __name__ == "__main__":